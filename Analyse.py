@@ -1,6 +1,9 @@
+import os
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+
+from utils_perf import lazy_import
+from utils_preview import preview_table
 
 # ✅ Configuration de la page
 st.set_page_config(page_title="Analyse", layout="wide")
@@ -20,6 +23,7 @@ if "Date" in df.columns:
 
 # --- 🔍 FILTRES DYNAMIQUES ---
 st.sidebar.header("🎛️ Filtres")
+date_range, selected_produits, selected_canaux = None, None, None
 
 # 1. Filtre par date
 if "Date" in df.columns:
@@ -77,6 +81,7 @@ st.markdown("---")
 st.subheader("🧩 Répartition par canal")
 if "Canal" in df.columns and "Total (€)" in df.columns:
     df_canaux = df.groupby("Canal")["Total (€)"].sum()
+    plt = lazy_import("matplotlib.pyplot")
     fig, ax = plt.subplots()
     ax.pie(df_canaux, labels=df_canaux.index, autopct='%1.1f%%', startangle=90)
     ax.axis("equal")
@@ -88,7 +93,8 @@ st.markdown("---")
 
 # ✅ Tableau des données
 st.subheader("📄 Aperçu des données")
-st.dataframe(df.head())
+preview_table(df, "analyse", view_key=(os.path.getmtime("donnees_entreprise.csv"), str(date_range),
+                                        str(selected_produits), str(selected_canaux)))
 
 st.markdown("---")
 
@@ -104,6 +110,7 @@ num_cols = df.select_dtypes(include='number').columns.tolist()
 if num_cols:
     col = st.selectbox("📌 Choisissez une colonne :", num_cols)
     try:
+        plt = lazy_import("matplotlib.pyplot")
         fig, ax = plt.subplots()
         df[col].hist(bins=15, ax=ax)
         ax.set_title(f"Distribution de {col}")
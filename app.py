@@ -1,7 +1,10 @@
 # app.py
 import streamlit as st
 
+from utils_perf import start_warmup, format_timings
+
 st.set_page_config(page_title="Analyse de Données – PME", page_icon="📈", layout="wide")
+start_warmup()  # préchargement plotly/kaleido en arrière-plan (APP_WARMUP=0 pour désactiver)
 
 st.title("📊 Analyse de Données pour Petites Entreprises")
 st.markdown("""
@@ -17,3 +20,6 @@ Bienvenue ! Cette application vous permet :
 """)
 
 st.info("Astuce : préparez vos CSV avec les colonnes `Date`, `Produit`, `Quantité`, `Prix unitaire (€)`, `Total (€)`, `Canal`.")
+
+with st.expander("⏱️ Temps de démarrage (imports & 1er rendu)"):
+    st.markdown(format_timings() or "Aucune mesure pour l’instant (préchauffage en cours).")
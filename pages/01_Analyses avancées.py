@@ -1,14 +1,15 @@
 # pages/01_Analyses avancées.py
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from dateutil.relativedelta import relativedelta
 
 from utils_io import read_table
 from utils_validate import clean_and_validate
 from utils_export import fig_to_png, fig_to_pdf
+from utils_perf import lazy_import, start_warmup
 
 st.set_page_config(page_title="Analyses avancées", page_icon="🧪", layout="wide")
+start_warmup()
 st.header("🧪 Analyses avancées")
 
 tab1, tab2 = st.tabs(["📂 Multi‑fichiers (A vs B)", "⏱️ Comparaison de périodes (1 fichier)"])
@@ -50,6 +51,8 @@ with tab1:
             c2.metric(f"{lb} — Total", f"{tB:,.2f} €".replace(",", " "))
             c3.metric("Différence (B - A)", f"{(tB - tA):,.2f} €".replace(",", " "))
 
+            px = lazy_import("plotly.express")
+
             # Évolution
             A = dfA.groupby("Date", as_index=False)["Total (€)"].sum().assign(Source=la)
             B = dfB.groupby("Date", as_index=False)["Total (€)"].sum().assign(Source=lb)
@@ -111,6 +114,8 @@ with tab2:
             c2.metric("Total B", f"{tB:,.2f} €".replace(",", " "))
             c3.metric("Différence B - A", f"{(tB - tA):,.2f} €".replace(",", " "))
 
+            px = lazy_import("plotly.express")
+
             # Évolution
             gA = A.groupby("Date", as_index=False)["Total (€)"].sum()
             gB = B.groupby("Date", as_index=False)["Total (€)"].sum()
@@ -1,14 +1,18 @@
 # pages/02_Tableau de bord.py
+import os
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 
-from utils_io import read_table
+from utils_io import read_table, build_manifest, load_folder
 from utils_validate import clean_and_validate
 from utils_forecast import forecast_baseline
-from utils_export import fig_to_png, fig_to_pdf, export_zip
+from utils_anomaly import scan_anomalies
+from utils_export import fig_to_png, fig_to_pdf, export_zip, available_formats
+from utils_preview import preview_table
+from utils_perf import build_on_demand, lazy_import, start_warmup, timed
 
 st.set_page_config(page_title="Tableau de bord", page_icon="📊", layout="wide")
+start_warmup()
 
 def example_df():
     return pd.DataFrame({
@@ -23,6 +27,8 @@ def example_df():
                   "Magasin","Site Web","Marché","Site Web","Site Web"]
     }).assign(**{"Total (€)": lambda d: d["Quantité"] * d["Prix unitaire (€)"]})
 
+ANOMALIES_MAX_POINTS = 500
+
 def compute_kpis(df):
     total = df["Total (€)"].sum() if "Total (€)" in df else 0
     n = len(df)
@@ -32,26 +38,66 @@ def compute_kpis(df):
 st.header("📊 Tableau de bord")
 
 left, right = st.columns([1, 1], gap="large")
+manifest = None
 with left:
     st.subheader("Importer des données")
-    uploaded = st.file_uploader("CSV/Excel (.csv, .xlsx)", type=["csv","xlsx","xls"])
-    if uploaded:
-        df_raw = read_table(uploaded)
+    source = st.radio("Source", ["Fichier", "Dossier d’exports"], horizontal=True)
+    if source == "Fichier":
+        uploaded = st.file_uploader("CSV/Excel (.csv, .xlsx)", type=["csv","xlsx","xls"])
+        if uploaded:
+            df_raw = read_table(uploaded)
+            source_key = uploaded.file_id
+        else:
+            st.info("Aucun fichier chargé — utilisation d’un **jeu d’exemple**.")
+            df_raw = example_df()
+            source_key = "exemple"
     else:
-        st.info("Aucun fichier chargé — utilisation d’un **jeu d’exemple**.")
-        df_raw = example_df()
-    df, issues = clean_and_validate(df_raw)
-    for msg in issues:
-        st.warning(msg)
+        dossier = st.text_input("Dossier local (un fichier CSV/Excel par magasin et par mois)")
+        if not dossier or not os.path.isdir(dossier):
+            st.info("Indiquez un **dossier existant** contenant les exports.")
+            st.stop()
+        manifest = build_manifest(dossier)
+        if manifest.empty:
+            st.warning("Aucun fichier CSV/Excel dans ce dossier.")
+            st.stop()
 
 with right:
     st.subheader("Filtres")
     date_range = None
-    if "Date" in df.columns and not df.empty:
-        dmin, dmax = df["Date"].min(), df["Date"].max()
-        date_range = st.date_input("Période", value=(dmin, dmax))
+    if manifest is not None:
+        # Filtres date/canal d'abord : ils déterminent les fichiers à lire.
+        # Par défaut, le dernier trimestre de l'archive (et non toute l'archive).
+        dmin, dmax = manifest["Date min"].min(), manifest["Date max"].max()
+        if pd.isna(dmin) or pd.isna(dmax):
+            st.warning("Aucun fichier du dossier n’a de colonne `Date` exploitable : pas de filtre de période.")
+        else:
+            debut = max(dmin, dmax - pd.DateOffset(months=3) + pd.Timedelta(days=1))
+            date_range = st.date_input("Période", value=(debut, dmax), min_value=dmin, max_value=dmax)
+        canaux = st.multiselect("Canal", sorted(set().union(*manifest["Canaux"])))
+        s, e = (pd.to_datetime(date_range[0]), pd.to_datetime(date_range[-1])) if date_range else (None, None)
+        chrono = {}
+        with timed("chargement", into=chrono):
+            df_raw, lus = load_folder(manifest, s, e, canaux)
+        if lus.empty:
+            st.info("Aucun fichier ne couvre cette période / ces canaux : élargissez les filtres.")
+            st.stop()
+        source_key = tuple(zip(lus["Fichier"], lus["Taille"], lus["Modifié"]))
+        st.caption(f"{len(lus)}/{len(manifest)} fichiers lus "
+                   f"({lus['Taille'].sum() / 1e6:,.1f} Mo) en {chrono['chargement']:.2f} s".replace(",", " "))
+
+    df, issues = clean_and_validate(df_raw)
+
+    if manifest is None:
+        if "Date" in df.columns and not df.empty:
+            dmin, dmax = df["Date"].min(), df["Date"].max()
+            date_range = st.date_input("Période", value=(dmin, dmax))
     produits = st.multiselect("Produit", sorted(df["Produit"].dropna().unique()) if "Produit" in df else [])
-    canaux = st.multiselect("Canal", sorted(df["Canal"].dropna().unique()) if "Canal" in df else [])
+    if manifest is None:
+        canaux = st.multiselect("Canal", sorted(df["Canal"].dropna().unique()) if "Canal" in df else [])
+
+with left:
+    for msg in issues:
+        st.warning(msg)
 
 # Appliquer filtres
 df_f = df.copy()
@@ -64,7 +110,7 @@ if canaux and "Canal" in df_f.columns:
     df_f = df_f[df_f["Canal"].isin(canaux)]
 
 st.markdown("### 🗂️ Aperçu")
-st.dataframe(df_f.head(200), use_container_width=True)
+preview_table(df_f, "dashboard", view_key=(source_key, str(date_range), tuple(produits), tuple(canaux)))
 
 st.markdown("### 📌 Indicateurs clés")
 k1, k2, k3 = st.columns(3)
@@ -74,6 +120,7 @@ k2.metric("🧾 Nb de transactions", f"{n}")
 k3.metric("🛒 Panier moyen", f"{panier:,.2f} €".replace(",", " "))
 
 st.markdown("### 📈 Visualisations")
+px = lazy_import("plotly.express")
 figs = {}
 
 if {"Produit","Total (€)"}.issubset(df_f.columns) and not df_f.empty:
@@ -103,6 +150,28 @@ if {"Date","Total (€)"}.issubset(df_f.columns) and not df_f.empty:
         st.plotly_chart(fig4, use_container_width=True)
         figs["evolution_prevision"] = fig4
 
+    # Jours atypiques (toutes les séries produit × canal)
+    st.markdown("### 🚨 Jours atypiques")
+    seuil = st.slider("Seuil de détection (score robuste)", 2.0, 8.0, 3.5, 0.5)
+    # Scan et CSV calculés une fois par vue, puis gardés en session (pas à chaque clic)
+    scan_key = (source_key, str(date_range), tuple(produits), tuple(canaux), seuil)
+    if st.session_state.get("anomalies", (None,))[0] != scan_key:
+        found = scan_anomalies(df_f, threshold=seuil)
+        st.session_state["anomalies"] = (scan_key, found, found.to_csv(index=False).encode("utf-8"))
+    _, anomalies, anomalies_csv = st.session_state["anomalies"]
+    if anomalies.empty:
+        st.info("Aucun jour atypique détecté avec ce seuil.")
+    else:
+        # Une seule trace, limitée aux ANOMALIES_MAX_POINTS plus forts scores
+        top = anomalies.head(ANOMALIES_MAX_POINTS)
+        fig5 = px.scatter(top, x="Date", y="Score", color="Score", color_continuous_scale="RdBu_r",
+                          hover_data=["Série", "Total (€)", "Référence (€)"],
+                          title=f"Jours atypiques par produit × canal ({len(top)} plus forts sur {len(anomalies)})")
+        st.plotly_chart(fig5, use_container_width=True)
+        preview_table(anomalies, "anomalies", view_key=scan_key)
+        st.download_button("⬇️ Jours atypiques (CSV)", data=anomalies_csv,
+                           file_name="jours_atypiques.csv", mime="text/csv", use_container_width=True)
+
 st.markdown("### ⤵️ Exports")
 # Export PNG/PDF pour le dernier graphe affiché (si tu veux des boutons par graphe, dupliques ces lignes)
 if figs:
@@ -119,6 +188,9 @@ kpis_dict = {
     "Nb transactions": n,
     "Panier moyen": f"{panier:,.2f} €".replace(",", " ")
 }
-zip_buf = export_zip(figs, df_f, kpis_dict)
-st.download_button("🗂️ Télécharger le rapport (ZIP complet)", data=zip_buf.getvalue(),
-                   file_name="rapport_analyse.zip", mime="application/zip", use_container_width=True)
+fmt = st.selectbox("Format des données dans le ZIP", available_formats(), index=0,
+                   help="CSV (défaut, compatible partout), CSV compressé (deflate/gzip), Parquet ou Feather (pyarrow requis).")
+build_on_demand("export_zip", (source_key, str(date_range), tuple(produits), tuple(canaux), fmt),
+                lambda: export_zip(figs, df_f, kpis_dict, fmt=fmt),
+                "🗂️ Préparer le rapport (ZIP complet)", "⬇️ Télécharger le rapport (ZIP complet)",
+                "rapport_analyse.zip", "application/zip")
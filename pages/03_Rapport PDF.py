@@ -2,20 +2,16 @@
 import io
 import datetime as dt
 import pandas as pd
-import plotly.express as px
 import streamlit as st
 
 from utils_io import read_table
 from utils_validate import clean_and_validate
-
-# PDF
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet
+from utils_preview import preview_table
+from utils_pdf import build_pdf, has_vector_support
+from utils_perf import build_on_demand, format_timings, lazy_import, start_warmup
 
 st.set_page_config(page_title="Rapport PDF", page_icon="🧾", layout="wide")
+start_warmup()
 st.header("🧾 Rapport PDF – KPI & Graphiques")
 
 def compute_kpis(df):
@@ -62,7 +58,7 @@ if df_f.empty:
     st.stop()
 
 st.markdown("### Aperçu")
-st.dataframe(df_f.head(50), use_container_width=True)
+preview_table(df_f, "rapport", view_key=(uploaded.file_id, str(date_range), tuple(produits), tuple(canaux)))
 
 # ---------- KPI
 total, n, panier = compute_kpis(df_f)
@@ -73,6 +69,7 @@ c2.metric("🧾 Nb de transactions", f"{n}")
 c3.metric("🛒 Panier moyen", f"{panier:,.2f} €".replace(",", " "))
 
 # ---------- Graphiques Plotly (on garde les objets pour le PDF)
+px = lazy_import("plotly.express")
 figs = []
 
 if {"Produit","Total (€)"}.issubset(df_f.columns):
@@ -95,50 +92,12 @@ if {"Date","Total (€)"}.issubset(df_f.columns):
 
 st.markdown("### Générer le PDF")
 
-def build_pdf(buffer: io.BytesIO, kpis, figs_png, meta):
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=1.5*cm, leftMargin=1.5*cm, topMargin=1.5*cm, bottomMargin=1.2*cm)
-    styles = getSampleStyleSheet()
-    H1, H2, P = styles["Title"], styles["Heading2"], styles["BodyText"]
-
-    story = []
-    title = Paragraph("Rapport d’Analyse des Ventes", H1)
-    story += [title, Spacer(1, 0.3*cm)]
-    story += [Paragraph(f"Projet : Analyse de Données pour Petites Entreprises", P)]
-    story += [Paragraph(f"Date : {meta['date']}", P)]
-    story += [Paragraph(f"Période filtrée : {meta['periode']}", P)]
-    if meta["produits"]:
-        story += [Paragraph(f"Produits : {', '.join(meta['produits'])}", P)]
-    if meta["canaux"]:
-        story += [Paragraph(f"Canaux : {', '.join(meta['canaux'])}", P)]
-    story += [Spacer(1, 0.5*cm)]
-
-    story += [Paragraph("Indicateurs clés", H2)]
-    t = Table([
-        ["Total des ventes", "Nb de transactions", "Panier moyen"],
-        [kpis["total"], kpis["nb"], kpis["panier"]],
-    ])
-    t.setStyle(TableStyle([
-        ("GRID", (0,0), (-1,-1), 0.3, colors.grey),
-        ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#f1f5f9")),
-        ("ALIGN", (0,0), (-1,-1), "CENTER"),
-        ("FONTSIZE", (0,0), (-1,-1), 10),
-        ("BOTTOMPADDING", (0,0), (-1,0), 6),
-    ]))
-    story += [t, Spacer(1, 0.6*cm)]
-
-    for name, png in figs_png:
-        story += [Paragraph(name.replace("_", " ").title(), H2), Spacer(1, 0.2*cm)]
-        story += [Image(io.BytesIO(png), width=16*cm, height=9*cm), Spacer(1, 0.6*cm)]
-
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
-
-# Convertir les figures en PNG (kaleido requis)
-figs_png = []
-for name, fig in figs:
-    png = fig.to_image(format="png", scale=2)  # si erreur -> installer/maj 'kaleido'
-    figs_png.append((name, png))
+c1, c2 = st.columns(2)
+with c1:
+    vector = st.checkbox("Graphiques vectoriels (SVG)", value=has_vector_support(), disabled=not has_vector_support(),
+                         help="Plus net et plus léger que le PNG ; nécessite 'svglib'.")
+with c2:
+    segment = st.selectbox("Une section par…", ["Aucune"] + [c for c in ("Produit", "Canal") if c in df_f.columns])
 
 # Meta & KPI formatés
 periode_txt = "-"
@@ -156,14 +115,9 @@ meta = {
     "canaux": [str(x) for x in canaux] if canaux else [],
 }
 
-pdf_buf = io.BytesIO()
-pdf_file = build_pdf(pdf_buf, kpis_fmt, figs_png, meta)
-
-st.download_button(
-    "⬇️ Télécharger le rapport PDF",
-    data=pdf_file.getvalue(),
-    file_name="rapport_analyse.pdf",
-    mime="application/pdf",
-    use_container_width=True
-)
-st.success("PDF généré avec succès ✅")
+build_on_demand("rapport_pdf", (uploaded.file_id, str(date_range), tuple(produits), tuple(canaux), vector, segment),
+                lambda: build_pdf(io.BytesIO(), kpis_fmt, figs, meta, vector=vector,
+                                  df=df_f, segment_col=None if segment == "Aucune" else segment),
+                "🧾 Générer le PDF", "⬇️ Télécharger le rapport PDF", "rapport_analyse.pdf", "application/pdf")
+with st.expander("⏱️ Temps de chargement (imports & préchauffage)"):
+    st.markdown(format_timings())
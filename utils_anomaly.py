@@ -0,0 +1,117 @@
+# utils_anomaly.py
+import numpy as np
+import pandas as pd
+
+from utils_forecast import daily_totals
+
+SERIES_KEYS = ("Produit", "Canal")
+
+def daily_matrix(df: pd.DataFrame, keys=SERIES_KEYS) -> pd.DataFrame:
+    """
+    Matrice dense jour × série des ventes (`Total (€)`), jours manquants = 0.
+    Une série = une combinaison des clés disponibles (ex. "Produit A · Magasin").
+    """
+    keys = [k for k in keys if k in df.columns]
+    if not keys:
+        daily = daily_totals(df).set_index("Date")[["Total (€)"]]
+        daily.columns = ["Total"]
+    else:
+        daily = daily_totals(df, keys).set_index(["Date", *keys])["Total (€)"].unstack(keys, fill_value=0)
+        daily.columns = [" · ".join(map(str, c)) if isinstance(c, tuple) else str(c) for c in daily.columns]
+    days = pd.date_range(daily.index.min(), daily.index.max(), freq="D")
+    return daily.reindex(days, fill_value=0).rename_axis("Date")
+
+# Part minimale de jours avec ventes pour traiter une série comme régulière
+DENSE_SHARE = 0.5
+# Plancher de l'échelle, en fraction du niveau de référence : une série parfaitement
+# régulière (MAD nulle) reste scorée, une baisse de 100 € à 1 € est signalée
+SCALE_FLOOR = 0.1
+# Séries intermittentes : fenêtre allongée (× 4) pour avoir assez de jours avec ventes,
+# dont au moins MIN_SALE_DAYS pour scorer
+SPARSE_WINDOW_FACTOR = 4
+MIN_SALE_DAYS = 3
+
+def _baseline(frame: pd.DataFrame, window: int, min_periods: int, method: str):
+    """Référence et échelle glissantes sur les `window` jours précédents (NaN ignorés)."""
+    roll = frame.rolling(window, min_periods=min_periods)
+    if method == "mad":
+        center = roll.median().shift(1)
+        # MAD glissante approchée : médiane des écarts à la médiane glissante
+        scale = (frame - center).abs().rolling(window, min_periods=min_periods).median().shift(1) / 0.6745
+    elif method == "zscore":
+        center = roll.mean().shift(1)
+        scale = roll.std().shift(1)
+    else:
+        raise ValueError(f"Méthode inconnue : {method!r} (attendu 'mad' ou 'zscore')")
+    return center, scale
+
+def scan_anomalies(df: pd.DataFrame, keys=SERIES_KEYS, window: int = 28, threshold: float = 3.5,
+                   method: str = "mad", min_periods: int = 7) -> pd.DataFrame:
+    """
+    Détecte les jours atypiques (pics/creux) sur toutes les séries d'un coup :
+    - method="mad"    : score robuste 0.6745 * (x - médiane) / MAD
+    - method="zscore" : (x - moyenne) / écart-type
+    La référence est calculée sur les `window` jours précédents (jour courant exclu),
+    avec une échelle d'au moins SCALE_FLOOR × |référence|.
+    Séries intermittentes (ventes moins d'un jour sur deux) : seuls les jours avec ventes
+    sont scorés, par rapport aux jours avec ventes des `window` × SPARSE_WINDOW_FACTOR
+    jours précédents. Les jours avant la première vente d'une série sont ignorés.
+    Retourne une table compacte [Date, Série, Total (€), Référence (€), Score] triée par |score|.
+    """
+    cols = ["Date", "Série", "Total (€)", "Référence (€)", "Score"]
+    if "Date" not in df or "Total (€)" not in df or df.empty:
+        return pd.DataFrame(columns=cols)
+
+    m = daily_matrix(df, keys)
+    has_sale = m != 0
+    started = has_sale.cummax()
+    active = m.where(started)      # NaN avant la 1re vente
+    sales = m.where(has_sale)      # NaN les jours sans vente
+    share = has_sale.astype(float).where(started).rolling(window, min_periods=min_periods).mean().shift(1)
+    sparse = (share < DENSE_SHARE).to_numpy()
+
+    center_d, scale_d = _baseline(active, window, min_periods, method)
+    center_s, scale_s = _baseline(sales, window * SPARSE_WINDOW_FACTOR, min(min_periods, MIN_SALE_DAYS), method)
+    c = np.where(sparse, center_s.to_numpy(), center_d.to_numpy())
+    s = np.where(sparse, scale_s.to_numpy(), scale_d.to_numpy())
+    s = np.maximum(s, SCALE_FLOOR * np.abs(c))  # NaN conservés
+
+    x = m.to_numpy()
+    scored = started.to_numpy() & ~(sparse & ~has_sale.to_numpy())
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.where(scored & (s > 0), (x - c) / s, np.nan)
+    rows, series = np.nonzero(np.abs(np.nan_to_num(score)) >= threshold)
+
+    out = pd.DataFrame({
+        "Date": m.index[rows],
+        "Série": m.columns[series],
+        "Total (€)": x[rows, series],
+        "Référence (€)": c[rows, series],
+        "Score": score[rows, series],
+    }, columns=cols)
+    return out.iloc[np.argsort(-np.abs(out["Score"].to_numpy()), kind="stable")].reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    # Vérification rapide : python utils_anomaly.py
+    days = pd.date_range("2024-01-01", periods=120, freq="D")
+    # Série intermittente : vend ~40 % des jours, pic ×250 le 100e jour
+    sparse = pd.DataFrame({"Date": days[[i for i in range(120) if i % 5 in (0, 2)]], "Produit": "A", "Canal": "Web"})
+    sparse["Total (€)"] = 10.0
+    sparse.loc[sparse["Date"] == days[100], "Total (€)"] = 2500.0
+    # Série régulière sans anomalie
+    dense = pd.DataFrame({"Date": days, "Produit": "B", "Canal": "Magasin",
+                          "Total (€)": 100.0 + np.sin(np.arange(120))})
+    # Série intermittente régulière : 100 € un jour sur dix, aucune anomalie
+    rare = pd.DataFrame({"Date": days[::10], "Produit": "C", "Canal": "Web", "Total (€)": 100.0})
+    # Produit lancé en cours de période : ses premiers jours ne sont pas des pics
+    launch = pd.DataFrame({"Date": days[60:], "Produit": "D", "Canal": "Magasin", "Total (€)": 50.0})
+    found = scan_anomalies(pd.concat([sparse, dense, rare, launch], ignore_index=True))
+    assert list(zip(found["Date"], found["Série"])) == [(days[100], "A · Web")], found
+
+    # Série constante (MAD nulle) qui chute de 100 € à 1 € : la baisse est signalée
+    flat = pd.DataFrame({"Date": days, "Produit": "E", "Canal": "Web", "Total (€)": 100.0})
+    flat.loc[80, "Total (€)"] = 1.0
+    found = scan_anomalies(flat)
+    assert list(found["Date"]) == [days[80]] and found["Score"].iloc[0] < 0, found
+    print("OK")
@@ -1,27 +1,90 @@
 # utils_export.py
+import gzip
+import importlib.util
 import io
 import zipfile
 
+import pandas as pd
+
+from utils_perf import timed
+
+CSV_CHUNK_ROWS = 100_000
+
+# format -> (nom du fichier dans le ZIP, compression de l'entrée ZIP)
+EXPORT_FORMATS = {
+    "csv": ("donnees_filtrees.csv", zipfile.ZIP_STORED),
+    "csv-deflate": ("donnees_filtrees.csv", zipfile.ZIP_DEFLATED),
+    "csv.gz": ("donnees_filtrees.csv.gz", zipfile.ZIP_STORED),
+    "parquet": ("donnees_filtrees.parquet", zipfile.ZIP_STORED),  # déjà compressé (zstd)
+    "feather": ("donnees_filtrees.feather", zipfile.ZIP_STORED),  # déjà compressé (lz4)
+}
+
+def available_formats() -> list:
+    """Formats utilisables ici : Parquet/Feather nécessitent pyarrow (optionnel)."""
+    has_arrow = importlib.util.find_spec("pyarrow") is not None
+    return [f for f in EXPORT_FORMATS if has_arrow or f not in ("parquet", "feather")]
+
 def fig_to_png(fig, scale: int = 2) -> bytes:
     return fig.to_image(format="png", scale=scale)  # nécessite kaleido
 
 def fig_to_pdf(fig) -> bytes:
     return fig.to_image(format="pdf")
 
-def export_zip(figs: dict, df_export, kpis: dict) -> io.BytesIO:
+def _write_csv_chunks(df, raw):
+    """Écrit le CSV par blocs de CSV_CHUNK_ROWS lignes dans un flux binaire."""
+    with io.TextIOWrapper(raw, encoding="utf-8", newline="") as txt:
+        for start in range(0, max(len(df), 1), CSV_CHUNK_ROWS):
+            df.iloc[start:start + CSV_CHUNK_ROWS].to_csv(txt, index=False, header=(start == 0))
+
+def _arrow_safe(df):
+    """
+    Colonnes objet aux types mélangés (ex. Excel : "x", 1, 2.5) converties en texte,
+    valeurs manquantes conservées : pyarrow refuse les colonnes hétérogènes.
+    """
+    mixed = [c for c in df.select_dtypes(include="object").columns
+             if pd.api.types.infer_dtype(df[c], skipna=True) not in ("string", "empty")]
+    return df.assign(**{c: df[c].map(str, na_action="ignore") for c in mixed}) if mixed else df
+
+def _write_data(z: zipfile.ZipFile, df_export, fmt: str):
+    name, compress_type = EXPORT_FORMATS[fmt]
+    # Parquet/Feather : écrits en mémoire (déjà compressés), CSV : écrit par blocs dans l'entrée ZIP
+    if fmt in ("parquet", "feather"):
+        df_export = _arrow_safe(df_export)
+        buf = io.BytesIO()
+        if fmt == "parquet":
+            df_export.to_parquet(buf, index=False, compression="zstd")
+        else:
+            df_export.reset_index(drop=True).to_feather(buf, compression="lz4")
+        z.writestr(name, buf.getvalue(), compress_type=compress_type)
+        return
+    with z.open(name, "w", force_zip64=True) as entry:  # compression du ZipFile
+        if fmt == "csv.gz":
+            with gzip.GzipFile(filename=name[:-3], mode="wb", fileobj=entry, compresslevel=6) as gz:
+                _write_csv_chunks(df_export, gz)
+        else:
+            _write_csv_chunks(df_export, entry)
+
+def export_zip(figs: dict, df_export, kpis: dict, fmt: str = "csv"):
     """
     figs: dict { "nom_graph": plotly_fig, ... }
-    df_export: DataFrame à exporter en CSV
+    df_export: DataFrame à exporter (CSV par défaut, voir EXPORT_FORMATS)
     kpis: dict {"Total ventes": "...", ...}
+    fmt: "csv" | "csv-deflate" | "csv.gz" | "parquet" | "feather"
+    Retourne (buffer ZIP, {"octets": taille du ZIP, "secondes": durée de l'export}).
     """
-    buf = io.BytesIO()
-    with zipfile.ZipFile(buf, "w") as z:
-        # CSV
-        z.writestr("donnees_filtrees.csv", df_export.to_csv(index=False).encode("utf-8"))
-        # Graphs PNG
-        for name, fig in figs.items():
-            z.writestr(f"{name}.png", fig_to_png(fig, scale=2))
-        # README KPIs
-        z.writestr("README.txt", "\n".join([f"{k}: {v}" for k, v in kpis.items()]).encode("utf-8"))
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export inconnu : {fmt!r} (attendu : {', '.join(EXPORT_FORMATS)})")
+    buf, stats = io.BytesIO(), {}
+    with timed("secondes", into=stats):
+        with zipfile.ZipFile(buf, "w", compression=EXPORT_FORMATS[fmt][1]) as z:
+            # Données filtrées
+            _write_data(z, df_export, fmt)
+            # Graphs PNG (déjà compressés)
+            for name, fig in figs.items():
+                z.writestr(f"{name}.png", fig_to_png(fig, scale=2), compress_type=zipfile.ZIP_STORED)
+            # README KPIs
+            z.writestr("README.txt", "\n".join([f"{k}: {v}" for k, v in kpis.items()]).encode("utf-8"),
+                       compress_type=zipfile.ZIP_DEFLATED)
+    stats["octets"] = buf.getbuffer().nbytes
     buf.seek(0)
-    return buf
+    return buf, stats
@@ -2,6 +2,10 @@
 import numpy as np
 import pandas as pd
 
+def daily_totals(df: pd.DataFrame, keys=()) -> pd.DataFrame:
+    """Agrège `Total (€)` par jour (et par clés éventuelles : Produit, Canal...)."""
+    return df.groupby(["Date", *keys], as_index=False, observed=True)["Total (€)"].sum().sort_values("Date")
+
 def forecast_baseline(df: pd.DataFrame, horizon_days: int = 30):
     """
     Baseline légère:
@@ -11,7 +15,7 @@ def forecast_baseline(df: pd.DataFrame, horizon_days: int = 30):
     """
     if "Date" not in df or "Total (€)" not in df:
         return None, None
-    daily = df.groupby("Date", as_index=False)["Total (€)"].sum().sort_values("Date")
+    daily = daily_totals(df)
     if len(daily) < 5:
         return None, None
 
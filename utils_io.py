@@ -1,4 +1,10 @@
 # utils_io.py
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 
 # Canonicalisation des noms de colonnes fréquents
@@ -18,9 +24,161 @@ def _canonicalize_columns(df: pd.DataFrame) -> pd.DataFrame:
 
 def read_table(file) -> pd.DataFrame:
     """Lit CSV ou Excel, puis harmonise les noms de colonnes."""
-    name = getattr(file, "name", "").lower()
+    name = str(file if isinstance(file, (str, os.PathLike)) else getattr(file, "name", "")).lower()
     if name.endswith(".xlsx") or name.endswith(".xls"):
         df = pd.read_excel(file)
     else:
         df = pd.read_csv(file)
     return _canonicalize_columns(df)
+
+# --- Mode dossier : un fichier par magasin/mois ---------------------------------
+
+EXTENSIONS = (".csv", ".xlsx", ".xls")
+
+# Manifeste conservé dans le dossier : un redémarrage ne relit que les fichiers nouveaux ou modifiés
+MANIFEST_FILE = ".manifeste.json"
+
+# Caches par processus (LRU), clé = chemin, invalidés si taille/mtime changent
+TABLE_CACHE_MAX_BYTES = 512 * 2**20
+MANIFEST_CACHE_MAX_ENTRIES = 50_000
+_MANIFEST_CACHE = OrderedDict()
+_TABLE_CACHE = OrderedDict()  # chemin -> (clé stat, DataFrame, octets)
+_table_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+def _stat_key(path: str):
+    info = os.stat(path)
+    return info.st_size, info.st_mtime
+
+def _forget(paths):
+    """Retire des caches les fichiers supprimés du dossier."""
+    global _table_cache_bytes
+    with _cache_lock:
+        for path in paths:
+            _MANIFEST_CACHE.pop(path, None)
+            hit = _TABLE_CACHE.pop(path, None)
+            if hit:
+                _table_cache_bytes -= hit[2]
+
+def _read_cached(path: str) -> pd.DataFrame:
+    global _table_cache_bytes
+    key = _stat_key(path)
+    with _cache_lock:
+        hit = _TABLE_CACHE.get(path)
+        if hit and hit[0] == key:
+            _TABLE_CACHE.move_to_end(path)
+            return hit[1]
+    df = read_table(path)
+    size = int(df.memory_usage(deep=True).sum())
+    with _cache_lock:
+        old = _TABLE_CACHE.pop(path, None)
+        if old:
+            _table_cache_bytes -= old[2]
+        if size <= TABLE_CACHE_MAX_BYTES:
+            _TABLE_CACHE[path] = (key, df, size)
+            _table_cache_bytes += size
+        while _table_cache_bytes > TABLE_CACHE_MAX_BYTES:
+            _, (_, _, freed) = _TABLE_CACHE.popitem(last=False)
+            _table_cache_bytes -= freed
+    return df
+
+def _scan_file(path: str, key) -> dict:
+    """Lit seulement `Date` et `Canal` pour indexer le fichier (min/max Date, canaux distincts)."""
+    usecols = lambda c: CANON.get(str(c).strip().lower(), c) in ("Date", "Canal")
+    if path.lower().endswith((".xlsx", ".xls")):
+        df = _canonicalize_columns(pd.read_excel(path, usecols=usecols))
+    else:
+        df = _canonicalize_columns(pd.read_csv(path, usecols=usecols))
+    dates = pd.to_datetime(df["Date"], errors="coerce") if "Date" in df else pd.Series(dtype="datetime64[ns]")
+    return {
+        "Fichier": path, "Taille": key[0], "Modifié": pd.Timestamp(key[1], unit="s"),
+        "Date min": dates.min(), "Date max": dates.max(),
+        "Canaux": tuple(sorted(df["Canal"].dropna().astype(str).unique())) if "Canal" in df else (),
+    }
+
+def _manifest_entry(path: str, saved: dict) -> tuple:
+    """(entrée, clé stat, relu ?) : cache mémoire, puis manifeste du dossier, sinon lecture du fichier."""
+    key = _stat_key(path)
+    with _cache_lock:
+        hit = _MANIFEST_CACHE.get(path)
+        if hit and hit[0] == key:
+            _MANIFEST_CACHE.move_to_end(path)
+            return hit[1], key, False
+    old = saved.get(os.path.basename(path))
+    if old and (old["Taille"], old["mtime"]) == key:
+        entry, rescanned = {
+            "Fichier": path, "Taille": key[0], "Modifié": pd.Timestamp(key[1], unit="s"),
+            "Date min": pd.Timestamp(old["Date min"]) if old["Date min"] else pd.NaT,
+            "Date max": pd.Timestamp(old["Date max"]) if old["Date max"] else pd.NaT,
+            "Canaux": tuple(old["Canaux"]),
+        }, False
+    else:
+        entry, rescanned = _scan_file(path, key), True
+    with _cache_lock:
+        _MANIFEST_CACHE[path] = (key, entry)
+        while len(_MANIFEST_CACHE) > MANIFEST_CACHE_MAX_ENTRIES:
+            _MANIFEST_CACHE.popitem(last=False)
+    return entry, key, rescanned
+
+def _load_saved_manifest(folder) -> dict:
+    try:
+        with open(os.path.join(folder, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(folder, results):
+    """Écrit le manifeste dans le dossier (ignoré si le dossier est en lecture seule)."""
+    iso = lambda d: None if pd.isna(d) else d.isoformat()
+    data = {os.path.basename(r["Fichier"]): {
+        "Taille": key[0], "mtime": key[1],
+        "Date min": iso(r["Date min"]), "Date max": iso(r["Date max"]), "Canaux": list(r["Canaux"]),
+    } for r, key, _ in results}
+    try:
+        with open(os.path.join(folder, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    except OSError:
+        pass
+
+def build_manifest(folder, max_workers: int = None) -> pd.DataFrame:
+    """
+    Manifeste léger d'un dossier d'exports : une ligne par fichier CSV/Excel
+    (chemin, taille, mtime, min/max `Date`, canaux distincts). Seuls les fichiers
+    nouveaux ou modifiés sont relus ; le manifeste est conservé dans le dossier (MANIFEST_FILE).
+    """
+    paths = sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(EXTENSIONS))
+    present, here = set(paths), os.path.dirname(os.path.join(folder, ""))
+    with _cache_lock:
+        gone = [p for p in [*_MANIFEST_CACHE, *_TABLE_CACHE] if os.path.dirname(p) == here and p not in present]
+    _forget(gone)
+
+    saved = _load_saved_manifest(folder)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(lambda p: _manifest_entry(p, saved), paths))
+    rows = [entry for entry, _, _ in results]
+    if any(rescanned for _, _, rescanned in results) or len(saved) != len(rows):
+        _save_manifest(folder, results)
+    return pd.DataFrame(rows, columns=["Fichier", "Taille", "Modifié", "Date min", "Date max", "Canaux"])
+
+def prune_manifest(manifest: pd.DataFrame, start=None, end=None, canaux=None) -> pd.DataFrame:
+    """Garde les fichiers qui recouvrent la période [start, end] et au moins un des canaux."""
+    keep = pd.Series(True, index=manifest.index)
+    if start is not None:
+        keep &= ~(manifest["Date max"] < pd.to_datetime(start))
+    if end is not None:
+        keep &= ~(manifest["Date min"] > pd.to_datetime(end))
+    if canaux:
+        wanted = {str(c) for c in canaux}
+        keep &= manifest["Canaux"].map(lambda cs: not cs or bool(wanted.intersection(cs)))
+    return manifest[keep]
+
+def load_folder(manifest: pd.DataFrame, start=None, end=None, canaux=None, max_workers: int = None):
+    """
+    Charge en parallèle les seuls fichiers du manifeste concernés par les filtres
+    (les fichiers inchangés viennent du cache). Retourne (DataFrame, manifeste retenu).
+    """
+    selected = prune_manifest(manifest, start, end, canaux)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        frames = list(pool.map(_read_cached, selected["Fichier"]))
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return df, selected
@@ -0,0 +1,149 @@
+# utils_pdf.py
+import importlib.util
+import io
+from itertools import islice
+
+import pandas as pd
+
+from utils_perf import lazy_import, timed
+
+def has_vector_support() -> bool:
+    """Graphiques Plotly vectoriels : SVG (kaleido) converti en dessin ReportLab par svglib (optionnel)."""
+    return importlib.util.find_spec("svglib") is not None
+
+def _fmt_eur(x) -> str:
+    return f"{x:,.2f} €".replace(",", " ")
+
+class _StreamedStory(list):
+    """
+    Story ReportLab alimentée au fil de l'eau par un générateur de flowables :
+    doc.build() consomme la liste par la tête, on la remplit par petits lots
+    pour ne jamais garder tout le document en mémoire.
+    """
+    def __init__(self, flowables, batch: int = 32):
+        super().__init__()
+        self._source = iter(flowables)
+        self._batch = batch
+
+    def __len__(self):
+        if list.__len__(self) < 2:
+            self.extend(islice(self._source, self._batch))
+        return list.__len__(self)
+
+def _figure_flowable(fig, width, height, vector: bool):
+    """Figure Plotly -> Drawing vectoriel (SVG + svglib) ou Image PNG (scale 2)."""
+    if vector:
+        svg2rlg = lazy_import("svglib.svglib").svg2rlg
+        drawing = svg2rlg(io.BytesIO(fig.to_image(format="svg", width=1000, height=int(1000 * height / width))))
+        k = width / drawing.width
+        drawing.width, drawing.height = drawing.width * k, drawing.height * k
+        drawing.scale(k, k)
+        return drawing
+    Image = lazy_import("reportlab.platypus").Image
+    return Image(io.BytesIO(fig.to_image(format="png", scale=2)), width=width, height=height)
+
+def _segment_chart(daily: pd.DataFrame, width, height):
+    """Courbe des ventes/jour d'un segment, dessinée directement en ReportLab (vectoriel, sans kaleido)."""
+    shapes = lazy_import("reportlab.graphics.shapes")
+    LinePlot = lazy_import("reportlab.graphics.charts.lineplots").LinePlot
+    colors = lazy_import("reportlab.lib.colors")
+
+    days = (daily.index - daily.index.min()).days
+    origin = daily.index.min()
+    drawing = shapes.Drawing(width, height)
+    plot = LinePlot()
+    plot.x, plot.y, plot.width, plot.height = 40, 20, width - 50, height - 30
+    plot.data = [list(zip(days.tolist(), daily["total"].tolist()))]
+    plot.lines[0].strokeColor = colors.HexColor("#2563eb")
+    plot.lines[0].strokeWidth = 1
+    plot.xValueAxis.labelTextFormat = lambda d: (origin + pd.Timedelta(days=d)).strftime("%d/%m/%y")
+    plot.xValueAxis.labels.fontSize = plot.yValueAxis.labels.fontSize = 7
+    plot.yValueAxis.valueMin = 0
+    drawing.add(plot)
+    return drawing
+
+def segment_aggregates(df: pd.DataFrame, segment_col: str) -> pd.DataFrame:
+    """Une seule agrégation groupée (segment, jour) -> total et nb de transactions."""
+    return (df.groupby([segment_col, "Date"], observed=True)["Total (€)"]
+              .agg(total="sum", nb="size"))
+
+def _segment_sections(agg: pd.DataFrame, segment_col: str, styles, cm):
+    platypus = lazy_import("reportlab.platypus")
+    Paragraph, Spacer, PageBreak = platypus.Paragraph, platypus.Spacer, platypus.PageBreak
+    H2, P = styles["Heading2"], styles["BodyText"]
+
+    totals = agg.groupby(level=0, observed=True)[["total", "nb"]].sum().sort_values("total", ascending=False)
+    for seg, row in totals.iterrows():
+        # Tranche du segment extraite à la demande (index trié par groupby) : une seule en mémoire
+        daily = agg.xs(seg, level=0)
+        panier = row["total"] / row["nb"] if row["nb"] else 0
+        yield PageBreak()
+        yield Paragraph(f"{segment_col} : {seg}", H2)
+        yield Paragraph(f"Total des ventes : {_fmt_eur(row['total'])} — Transactions : {int(row['nb'])} "
+                        f"— Panier moyen : {_fmt_eur(panier)}", P)
+        if len(daily) > 1:
+            yield Spacer(1, 0.3*cm)
+            yield _segment_chart(daily, 16*cm, 6*cm)
+
+def build_pdf(buffer: io.BytesIO, kpis, figs, meta, vector: bool = False, df=None, segment_col=None):
+    """
+    figs: liste [(nom, figure Plotly), ...], rendues en vectoriel si `vector` (svglib requis), sinon en PNG
+    df / segment_col: ajoute une section par valeur de `segment_col` (ex. "Produit", "Canal")
+    Le document est construit au fil de l'eau.
+    Retourne (buffer, {"octets": taille du PDF, "pages": nombre de pages, "secondes": durée}).
+    """
+    # PDF (reportlab importé seulement à la génération)
+    A4 = lazy_import("reportlab.lib.pagesizes").A4
+    cm = lazy_import("reportlab.lib.units").cm
+    colors = lazy_import("reportlab.lib.colors")
+    platypus = lazy_import("reportlab.platypus")
+    SimpleDocTemplate, Paragraph, Spacer = platypus.SimpleDocTemplate, platypus.Paragraph, platypus.Spacer
+    Table, TableStyle = platypus.Table, platypus.TableStyle
+    getSampleStyleSheet = lazy_import("reportlab.lib.styles").getSampleStyleSheet
+
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=1.5*cm, leftMargin=1.5*cm, topMargin=1.5*cm, bottomMargin=1.2*cm)
+    styles = getSampleStyleSheet()
+    H1, H2, P = styles["Title"], styles["Heading2"], styles["BodyText"]
+
+    def story():
+        yield Paragraph("Rapport d’Analyse des Ventes", H1)
+        yield Spacer(1, 0.3*cm)
+        yield Paragraph(f"Projet : Analyse de Données pour Petites Entreprises", P)
+        yield Paragraph(f"Date : {meta['date']}", P)
+        yield Paragraph(f"Période filtrée : {meta['periode']}", P)
+        if meta["produits"]:
+            yield Paragraph(f"Produits : {', '.join(meta['produits'])}", P)
+        if meta["canaux"]:
+            yield Paragraph(f"Canaux : {', '.join(meta['canaux'])}", P)
+        yield Spacer(1, 0.5*cm)
+
+        yield Paragraph("Indicateurs clés", H2)
+        t = Table([
+            ["Total des ventes", "Nb de transactions", "Panier moyen"],
+            [kpis["total"], kpis["nb"], kpis["panier"]],
+        ])
+        t.setStyle(TableStyle([
+            ("GRID", (0,0), (-1,-1), 0.3, colors.grey),
+            ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#f1f5f9")),
+            ("ALIGN", (0,0), (-1,-1), "CENTER"),
+            ("FONTSIZE", (0,0), (-1,-1), 10),
+            ("BOTTOMPADDING", (0,0), (-1,0), 6),
+        ]))
+        yield t
+        yield Spacer(1, 0.6*cm)
+
+        for name, fig in figs:
+            yield Paragraph(name.replace("_", " ").title(), H2)
+            yield Spacer(1, 0.2*cm)
+            yield _figure_flowable(fig, 16*cm, 9*cm, vector)  # kaleido requis
+            yield Spacer(1, 0.6*cm)
+
+        if df is not None and segment_col in df.columns:
+            yield from _segment_sections(segment_aggregates(df, segment_col), segment_col, styles, cm)
+
+    stats = {}
+    with timed("secondes", into=stats):
+        doc.build(_StreamedStory(story()))
+    stats.update(octets=buffer.getbuffer().nbytes, pages=doc.page)
+    buffer.seek(0)
+    return buffer, stats
@@ -0,0 +1,102 @@
+# utils_perf.py
+import importlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Mesures (secondes) propres au processus : imports et préchauffage, identiques pour toutes les sessions.
+# Les mesures d'une requête (export, PDF...) passent un dict local à timed(..., into=...).
+TIMINGS = {}
+
+_warmup_lock = threading.Lock()
+_warmup_thread = None
+
+@contextmanager
+def timed(label: str, into: dict = None):
+    """Mesure la durée du bloc et l'enregistre dans into[label] (TIMINGS par défaut)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        (TIMINGS if into is None else into)[label] = time.perf_counter() - t0
+
+def lazy_import(module: str):
+    """
+    Importe un module au moment de l'usage (import lourd : plotly, reportlab, matplotlib).
+    Le premier import est chronométré dans TIMINGS["import <module>"].
+    """
+    label = f"import {module}"
+    if label in TIMINGS:
+        return importlib.import_module(module)
+    with timed(label):
+        return importlib.import_module(module)
+
+def warmup():
+    """
+    Préchauffage : charge plotly.express et ses templates, puis démarre le moteur
+    de rendu kaleido avec une mini-figure (le 1er to_image est le plus lent).
+    kaleido 0.2.x garde son processus de rendu entre deux appels ; kaleido >= 1.0
+    lance un Chromium par appel, sauf si le serveur persistant (start_sync_server) tourne.
+    """
+    px = lazy_import("plotly.express")
+    pio = lazy_import("plotly.io")
+    with timed("warmup templates"):
+        pio.templates[pio.templates.default]
+    try:
+        kaleido = lazy_import("kaleido")
+        if hasattr(kaleido, "start_sync_server"):
+            with timed("warmup kaleido (serveur)"):
+                kaleido.start_sync_server()
+        with timed("warmup kaleido (1er rendu)"):
+            px.bar(x=[0], y=[0]).to_image(format="png", width=10, height=10)
+    except Exception:
+        # kaleido absent ou indisponible : les exports échoueront plus tard avec un message clair
+        TIMINGS.pop("warmup kaleido (1er rendu)", None)
+
+def start_warmup():
+    """
+    Lance warmup() une seule fois par processus, dans un thread d'arrière-plan.
+    Streamlit n'a pas de point d'accroche au démarrage du serveur : l'appel se fait
+    en tête de chaque page, donc le préchauffage part à la 1re visite d'une page.
+    Désactivable avec la variable d'environnement APP_WARMUP=0.
+    """
+    global _warmup_thread
+    if os.environ.get("APP_WARMUP", "1") == "0":
+        return None
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=warmup, name="app-warmup", daemon=True)
+            _warmup_thread.start()
+    return _warmup_thread
+
+def format_timings(timings: dict = None) -> str:
+    """Résumé lisible des mesures (TIMINGS par défaut), une ligne par étiquette."""
+    # Copie : le thread de préchauffage peut ajouter des clés pendant l'affichage
+    items = list((TIMINGS if timings is None else timings).items())
+    return "\n".join(f"- {k} : {v * 1000:,.0f} ms".replace(",", " ") for k, v in items)
+
+def format_build_stats(stats: dict) -> str:
+    """Résumé d'un fichier généré : pages éventuelles, taille, durée."""
+    parts = [f"{stats['pages']} pages"] if "pages" in stats else []
+    parts += [f"{stats['octets'] / 1e6:,.2f} Mo", f"{stats['secondes']:.2f} s"]
+    return ("✅ Prêt — " + " · ".join(parts)).replace(",", " ")
+
+def build_on_demand(state_key: str, view_key, build, build_label: str, download_label: str,
+                    file_name: str, mime: str):
+    """
+    Bouton « générer » + téléchargement. build() -> (buffer, stats) n'est appelé qu'au clic ;
+    le fichier reste en session sous `state_key` tant que `view_key` (filtres, options) ne change pas.
+    Retourne les stats du fichier prêt, ou None.
+    """
+    st = lazy_import("streamlit")
+    if st.button(build_label, use_container_width=True):
+        buffer, stats = build()
+        st.session_state[state_key] = (view_key, buffer.getvalue(), stats)
+    hit = st.session_state.get(state_key)
+    if not hit or hit[0] != view_key:
+        return None
+    _, data, stats = hit
+    st.download_button(download_label, data=data, file_name=file_name, mime=mime, use_container_width=True)
+    st.caption(format_build_stats(stats))
+    return stats
@@ -0,0 +1,69 @@
+# utils_preview.py
+import math
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Nombre d'ordres de tri gardés par session : (tableau, vue, colonne, croissant) -> positions triées
+ORDER_CACHE_SIZE = 8
+
+def sort_order(df: pd.DataFrame, col: str, ascending: bool = True, view_key=None, cache=None) -> np.ndarray:
+    """
+    Positions des lignes triées par `col` (tri stable, valeurs manquantes en fin).
+    Avec `cache` (OrderedDict) et `view_key` identifiant la vue filtrée, l'argsort
+    est calculé une seule fois par colonne ; un ordre qui ne correspond plus à `df`
+    (clé de vue incomplète) est recalculé.
+    """
+    key = (view_key, col, ascending)
+    if cache is not None and view_key is not None and key in cache:
+        if len(cache[key]) == len(df):
+            cache.move_to_end(key)
+            return cache[key]
+        del cache[key]
+    values = df[col].reset_index(drop=True)
+    try:
+        order = values.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+    except TypeError:
+        # Colonne aux types mélangés (ex. Excel : "x", 1, 2.5) : tri sur le texte
+        order = values.sort_values(ascending=ascending, kind="stable", na_position="last",
+                                   key=lambda s: s.map(str, na_action="ignore")).index.to_numpy()
+    if cache is not None and view_key is not None:
+        cache[key] = order
+        while len(cache) > ORDER_CACHE_SIZE:
+            cache.popitem(last=False)
+    return order
+
+def page_view(df: pd.DataFrame, page: int, page_size: int = 50, sort_col=None,
+              ascending: bool = True, view_key=None, cache=None) -> pd.DataFrame:
+    """Une seule page (numérotée à partir de 1) de la vue triée : seules ces lignes sont matérialisées."""
+    start = (page - 1) * page_size
+    if sort_col is None:
+        return df.iloc[start:start + page_size]
+    return df.iloc[sort_order(df, sort_col, ascending, view_key, cache)[start:start + page_size]]
+
+def preview_table(df: pd.DataFrame, key: str, view_key=None, page_size: int = 50):
+    """
+    Aperçu paginé et triable : le navigateur ne reçoit qu'une page de lignes.
+    Les ordres de tri sont mis en cache dans la session (jamais partagés entre utilisateurs).
+    """
+    c1, c2, c3, c4 = st.columns([2, 1, 1, 1])
+    sort_col = c1.selectbox("Trier par", ["(ordre du fichier)", *df.columns], key=f"{key}_sort")
+    ascending = c2.radio("Ordre", ["↑", "↓"], horizontal=True, key=f"{key}_asc") == "↑"
+    page_size = c3.selectbox("Lignes/page", [25, 50, 100, 200], index=[25, 50, 100, 200].index(page_size),
+                             key=f"{key}_size")
+    n_pages = max(1, math.ceil(len(df) / page_size))
+    # Page initialisée uniquement via session_state (pas de value= sur le widget)
+    if st.session_state.get(f"{key}_page", 1) > n_pages or f"{key}_page" not in st.session_state:
+        st.session_state[f"{key}_page"] = 1
+    page = c4.number_input("Page", min_value=1, max_value=n_pages, step=1, key=f"{key}_page")
+
+    col = None if sort_col == "(ordre du fichier)" else sort_col
+    cache = st.session_state.setdefault("_preview_orders", OrderedDict())
+    # Clé du tableau incluse : le cache de session est partagé entre pages et aperçus
+    view_key = None if view_key is None else (key, view_key)
+    st.dataframe(page_view(df, int(page), page_size, col, ascending, view_key, cache), use_container_width=True)
+    start = (int(page) - 1) * page_size
+    st.caption(f"Lignes {min(start + 1, len(df))}–{min(start + page_size, len(df))} sur {len(df):,} "
+               f"· page {int(page)}/{n_pages}".replace(",", " "))